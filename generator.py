@@ -2,30 +2,23 @@ import argparse
 import os
 import random
 
+import numpy as np
+
 def generate_board(rows, cols, num_mines):
     max_mines = rows * cols - 1
     num_mines = min(num_mines, max_mines)
 
-    board = [[0 for _ in range(cols)] for _ in range(rows)] # initializes empty board
-    mine_positions = set()
-
-    # randomly picks a position for each mine
-    while len(mine_positions) < num_mines:
-        r = random.randint(0, rows - 1)
-        c = random.randint(0, cols - 1)
-        mine_positions.add((r, c))
-
-    for r, c in mine_positions:
-        board[r][c] = '*'
+    # randomly picks distinct flat positions for the mines, no retries needed
+    mines = np.zeros(rows * cols, dtype=np.uint8) # mine mask, 1 where a mine is placed
+    mines[random.sample(range(rows * cols), num_mines)] = 1
+    mines = mines.reshape(rows, cols)
 
-    directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+    # sums the 3x3 window around every cell over a zero-padded copy, then drops the cell itself
+    padded = np.pad(mines, 1)
+    counts = sum(padded[dr:dr + rows, dc:dc + cols] for dr in range(3) for dc in range(3)) - mines
 
-    for r in range(rows):
-        for c in range(cols):
-            if board[r][c] == '*':
-                continue
-            count = sum(1 for x, y in directions if (0 <= r + x < rows and 0 <= c + y < cols) and (board[r + x][c + y] == '*')) # checks if neighboring cell is inside board and contains a mine
-            board[r][c] = count
+    board = counts.astype(object)
+    board[mines == 1] = '*'
 
     return board
 
@@ -1,22 +1,38 @@
 import os
+import random
+from multiprocessing import Pool
+
+import numpy as np
+
 from system import Board, solve_ai
 
 NUM_RUNS = 100
 MAP_DIR = ""
 BASE_FILENAME = "8x8_10mines_map"
 
-win_count = 0
 
-for i in range(1, NUM_RUNS + 1):
+def seed_worker():
+    # forked workers inherit the parent's RNG state, so give each its own
+    random.seed()
+    np.random.seed()
+
+
+def run_game(i):
     filename = os.path.join(MAP_DIR, f"{BASE_FILENAME}{i}.txt")
     print(f"Running simulation on: {filename}")
     board = Board(filename)
     try:
         solve_ai(board)
-        if board.is_solved():
-            win_count += 1
+        return board.is_solved()
     except Exception as e:
         print(f"Error in game {i}: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    # games are independent, so spread them across all cores
+    with Pool(initializer=seed_worker) as pool:
+        win_count = sum(pool.imap_unordered(run_game, range(1, NUM_RUNS + 1), chunksize=4))
 
-print(f"Total wins out of {NUM_RUNS}: {win_count}")
-print(f"Win rate: {win_count / NUM_RUNS * 100:.2f}%")
+    print(f"Total wins out of {NUM_RUNS}: {win_count}")
+    print(f"Win rate: {win_count / NUM_RUNS * 100:.2f}%")
@@ -1,67 +1,309 @@
 import random
+import re
+import sys
 import time
 import itertools
+import warnings
+import math
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, count_models falls back to plain Python
+    njit = None
+
+
+def iter_bits(bb):
+    # yields the index of each set bit of bb, lowest first
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+@lru_cache(maxsize=None)
+def neighbor_table(rows, cols):
+    # per flat index r * cols + c: the in-bounds neighbor cells
+    return tuple(tuple((r + dr, c + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                       if (dr or dc) and 0 <= r + dr < rows and 0 <= c + dc < cols)
+                 for r in range(rows) for c in range(cols))
+
+
+def neighbor_counts(mask):
+    # number of True cells among the 8 neighbors of every cell of a 2-D boolean mask:
+    # a separable 3x3 box sum from shifted in-place slice adds, minus the cell itself
+    m = mask.astype(np.int8)
+    row_sums = m.copy()
+    row_sums[:, 1:] += m[:, :-1]
+    row_sums[:, :-1] += m[:, 1:]
+    box = row_sums.copy()
+    box[1:] += row_sums[:-1]
+    box[:-1] += row_sums[1:]
+    return box - m
+
+
+def count_models(masks, reqs, n):
+    # counts the assignments of n cells meeting every (mask, req) constraint,
+    # and how many of those put a mine on each cell
+    # clues that see the same covered cells give duplicate constraints, which
+    # only need checking once
+    constraints = sorted(set(zip(masks, reqs)))
+    cell_cons = [[k for k, (mask, _) in enumerate(constraints) if mask >> j & 1] for j in range(n)]
+    # most constrained cell first, then always the cell sharing the most
+    # constraints with those already placed, so constraints fill up and prune early
+    order, touched, todo = [], set(), set(range(n))
+    while todo:
+        j = max(todo, key=lambda j: (sum(k in touched for k in cell_cons[j]), len(cell_cons[j]), -j))
+        order.append(j)
+        touched.update(cell_cons[j])
+        todo.remove(j)
+    # struct-of-arrays layout: constraints of cell j are idx[ptr[j]:ptr[j + 1]]
+    ptr = [0]
+    for ks in cell_cons:
+        ptr.append(ptr[-1] + len(ks))
+    idx = [k for ks in cell_cons for k in ks]
+    reqs = [req for _, req in constraints]
+    sizes = [mask.bit_count() for mask, _ in constraints]
+    if njit is not None:
+        counts = np.zeros(n, dtype=np.int64)
+        total = _backtrack_jit(np.array(order, dtype=np.int64), np.array(ptr, dtype=np.int64),
+                               np.array(idx, dtype=np.int64), np.array(reqs, dtype=np.int64),
+                               np.array(sizes, dtype=np.int64), np.zeros(len(reqs), dtype=np.int64),
+                               np.full(n, -1, dtype=np.int64), counts)
+        return total, counts
+    counts = [0] * n
+    total = _backtrack(order, ptr, idx, reqs, sizes, [0] * len(reqs), [-1] * n, counts)
+    return total, counts
+
+
+def _backtrack(order, ptr, idx, reqs, left, cur, value, counts):
+    # depth-first search over cells in the given order with an explicit stack:
+    # value[d] is the value tried at depth d (-1 before the first), cur and left
+    # are each constraint's mines placed and cells still open; a branch is cut as
+    # soon as some constraint has too many mines or too few cells left to reach
+    # req; adds each full assignment's mines to counts and returns how many there are
+    n = len(order)
+    total = 0
+    d = 0
+    while d >= 0:
+        j = order[d]
+        if value[d] >= 0:
+            for p in range(ptr[j], ptr[j + 1]):
+                cur[idx[p]] -= value[d]
+                left[idx[p]] += 1
+        value[d] += 1
+        if value[d] > 1:
+            value[d] = -1
+            d -= 1
+            continue
+        ok = True
+        for p in range(ptr[j], ptr[j + 1]):
+            k = idx[p]
+            cur[k] += value[d]
+            left[k] -= 1
+            if cur[k] > reqs[k] or cur[k] + left[k] < reqs[k]:
+                ok = False
+        if not ok:
+            continue
+        if d == n - 1:
+            total += 1
+            for e in range(n):
+                if value[e] == 1:
+                    counts[order[e]] += 1
+        else:
+            d += 1
+    return total
+
+
+if njit is not None:
+    _backtrack_jit = njit(cache=True)(_backtrack)
+
+
+def simplify_constraints(masks, reqs):
+    # rewrites (mask, req) constraints into an equivalent, smaller set: a constraint
+    # containing another is replaced by their difference, and constraints needing
+    # no mines or all mines settle their cells, until neither rule applies;
+    # returns (constraints, safe bits, mine bits), or None on a contradiction
+    constraints = set(zip(masks, reqs))
+    safe = mines = 0
+    while True:
+        settled = False
+        for mask, req in constraints:
+            if req < 0 or req > mask.bit_count():
+                return None
+            if req == 0:
+                safe |= mask
+                settled = True
+            elif req == mask.bit_count():
+                mines |= mask
+                settled = True
+        if safe & mines:
+            return None
+        if settled:
+            reduced = set()
+            for mask, req in constraints:
+                rest = mask & ~(safe | mines)
+                rest_req = req - (mask & mines).bit_count()
+                if rest:
+                    reduced.add((rest, rest_req))
+                elif rest_req:
+                    return None
+            constraints = reduced
+            continue
+        pair = next(((a, b) for a in constraints for b in constraints
+                     if a[0] != b[0] and a[0] & b[0] == b[0]), None)
+        if pair is None:
+            return list(constraints), safe, mines
+        (outer, outer_req), (inner, inner_req) = pair
+        constraints.remove((outer, outer_req))
+        constraints.add((outer ^ inner, outer_req - inner_req))
+
+
+def split_components(masks, n):
+    # groups n cells into independent components linked by shared constraints,
+    # returning (cell indices, constraint indices) per component
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for mask in masks:
+        first, *rest = iter_bits(mask)
+        for i in rest:
+            parent[find(i)] = find(first)
+    components = {}
+    for i in range(n):
+        components.setdefault(find(i), ([], []))[0].append(i)
+    for k, mask in enumerate(masks):
+        components[find((mask & -mask).bit_length() - 1)][1].append(k)
+    return list(components.values())
+
+
+# largest frontier estimate_probabilities will search exhaustively
+MAX_FRONTIER = 26
+
 
 class Board:
+    MINE = -1
+
     def __init__(self, filename):
         self.filename = filename
-        self.board = []
+        self.board = None
         self.rows = 0
         self.cols = 0
         self.num_mines = 0
-        self.revealed = set()
-        self.flagged = set()
+        # bitboards over flat index r * cols + c
+        self.revealed_bb = 0
+        self.flagged_bb = 0
+        self._revealed_count = 0
         self.load_board()
+        self._init_layout()
+
+    def _init_layout(self):
+        self.mine_mask = self.board == self.MINE
+        self.full_mask = (1 << (self.rows * self.cols)) - 1
+        self._target_reveals = self.rows * self.cols - self.num_mines
+        self._header = '   ' + ' '.join(f"{c:>2}" for c in range(self.cols))
 
     def load_board(self):
-        with open(self.filename, 'r') as f:
-            header = f.readline().strip().split()
+        with open(self.filename, 'rb') as f:
+            header = f.readline().split()
             if len(header) != 3:
                 raise ValueError("First line must be: rows cols num_mines")
             self.rows, self.cols, self.num_mines = map(int, header)
-            for line in f:
-                parts = line.strip().split()
-                if not parts:
-                    continue
-                if len(parts) != self.cols:
-                    raise ValueError(f"Expected {self.cols} cols, got {len(parts)}")
-                row = [('*' if v == '*' else int(v)) for v in parts]
-                self.board.append(row)
-        if len(self.board) != self.rows:
-            raise ValueError(f"Expected {self.rows} rows, got {len(self.board)}")
+            data = f.read()
+        # tokens per non-blank line, counted from where tokens start in the raw
+        # bytes so the grid is only tokenized once, by the bulk parse below
+        buf = np.frombuffer(data, dtype=np.uint8)
+        word = buf > ord(' ')
+        starts = np.flatnonzero(word & ~np.concatenate(([False], word[:-1])))
+        line_ends = np.append(np.flatnonzero(buf == ord('\n')), buf.size)
+        per_line = np.diff(np.searchsorted(starts, line_ends), prepend=0)
+        per_line = per_line[per_line > 0]
+        wrong = per_line[per_line != self.cols]
+        if wrong.size:
+            raise ValueError(f"Expected {self.cols} cols, got {wrong[0]}")
+        if len(per_line) != self.rows:
+            raise ValueError(f"Expected {self.rows} rows, got {len(per_line)}")
+        # parse the whole grid in one pass, with mines written as -1; a bad
+        # token raises (or only warns, on older numpy) and is reported below.
+        # int64 keeps out-of-range values intact so they can be rejected
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            try:
+                cells = np.fromstring(data.replace(b'*', b'-1'), dtype=np.int64, sep=' ')
+            except (ValueError, DeprecationWarning):
+                cells = np.empty(0, dtype=np.int64)
+        if cells.size != self.rows * self.cols:
+            bad = next((v for v in data.split() if not re.fullmatch(rb'\*|-?\d+', v)), None)
+            if bad is None:
+                raise ValueError("Invalid board data")
+            raise ValueError(f"Invalid cell value: {bad.decode()}")
+        out_of_range = (cells < self.MINE) | (cells > 8)
+        if out_of_range.any():
+            i = np.flatnonzero(out_of_range)[0]
+            raise ValueError(f"Invalid cell value: {data.split()[i].decode()}")
+        self.board = cells.astype(np.int8).reshape(self.rows, self.cols)
+
+    def is_mine(self, r, c):
+        return self.mine_mask[r, c]
+
+    def bit(self, r, c):
+        return 1 << (r * self.cols + c)
+
+    def covered_bb(self):
+        return ~(self.revealed_bb | self.flagged_bb) & self.full_mask
+
+    def covered_cells(self):
+        return [divmod(i, self.cols) for i in iter_bits(self.covered_bb())]
+
+    def bb_mask(self, bb):
+        # boolean rows x cols mask with True at each set bit of bb
+        n = self.rows * self.cols
+        raw = np.frombuffer(bb.to_bytes((n + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder='little')[:n].reshape(self.rows, self.cols).view(bool)
 
     def print_board(self, reveal_all=False):
-        header = '   ' + ' '.join(f"{c:>2}" for c in range(self.cols))
-        print(header)
+        lines = [self._header]
         for r in range(self.rows):
             row = []
             for c in range(self.cols):
-                if reveal_all or (r, c) in self.revealed:
-                    row.append(str(self.board[r][c]).rjust(2))
-                elif (r, c) in self.flagged:
-                    row.append('F'.rjust(2))
+                bit = self.bit(r, c)
+                if reveal_all or self.revealed_bb & bit:
+                    row.append(f"{'*' if self.is_mine(r, c) else int(self.board[r, c]):>2}")
+                elif self.flagged_bb & bit:
+                    row.append(' F')
                 else:
-                    row.append('?'.rjust(2))
-            print(str(r).rjust(2), ' '.join(row))
+                    row.append(' ?')
+            lines.append(f"{r:>2} " + ' '.join(row))
+        sys.stdout.write('\n'.join(lines) + '\n')
 
     def reveal(self, r, c):
-        if (r, c) in self.revealed or (r, c) in self.flagged:
+        bit = self.bit(r, c)
+        if (self.revealed_bb | self.flagged_bb) & bit:
             return None
-        self.revealed.add((r, c))
-        return self.board[r][c]
+        self.revealed_bb |= bit
+        self._revealed_count += 1
+        return int(self.board[r, c])
 
     def flag(self, r, c):
-        if (r, c) not in self.revealed:
-            self.flagged.add((r, c))
+        bit = self.bit(r, c)
+        if not self.revealed_bb & bit:
+            self.flagged_bb |= bit
 
     def apply_move(self, action, r, c):
         if action == 'R':
-            if (r, c) in self.flagged:
+            if self.flagged_bb & self.bit(r, c):
                 return 'flagged_cell'
             res = self.reveal(r, c)
             if res is None:
                 return 'already_revealed'
-            if res == '*':
+            if res == self.MINE:
                 return 'hit_mine'
             return res
         elif action == 'F':
@@ -71,49 +313,66 @@ class Board:
             return 'invalid'
 
     def is_solved(self):
-        return len(self.revealed) == self.rows * self.cols - self.num_mines
+        return self._revealed_count == self._target_reveals
 
 class MinesweeperAgent:
     COVERED = 9
     FLAGGED = 10
+    SAFE = 11
+    # _COMB[n][k] == comb(n, k) for the at most 8 neighbors of a clue
+    _COMB = [[math.comb(n, k) for k in range(9)] for n in range(9)]
 
     def __init__(self, state):
-        self.state = [row[:] for row in state]
+        self.state = np.array(state, dtype=np.int8)
         self.rows = len(state)
         self.cols = len(state[0])
+        self._neighbors = neighbor_table(self.rows, self.cols)
+        # cells whose neighborhood changed since propagate last looked at them
+        self.dirty = np.ones((self.rows, self.cols), dtype=bool)
+        # covered cells estimate_probabilities has already proven safe or mined
+        self.known_safe, self.known_mines = set(), set()
 
     def neighbors(self, r, c):
-        for dr in (-1, 0, 1):
-            for dc in (-1, 0, 1):
-                if dr == 0 and dc == 0:
-                    continue
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                    yield nr, nc
+        return self._neighbors[r * self.cols + c]
+
+    def update_cell(self, r, c, value):
+        self.state[r, c] = value
+        self.known_safe.discard((r, c))
+        self.known_mines.discard((r, c))
+        # only clues next to a changed cell can reach a new conclusion
+        self.dirty[max(r - 1, 0):r + 2, max(c - 1, 0):c + 2] = True
+
+    def clue_cells(self):
+        # (r, c) of every revealed number cell, found with one mask over the state
+        clues = (self.state >= 0) & (self.state <= 8)
+        return [divmod(int(i), self.cols) for i in np.flatnonzero(clues)]
 
     def propagate(self):
-        new_safe, new_mines = set(), set()
-        for r in range(self.rows):
-            for c in range(self.cols):
-                v = self.state[r][c]
-                if isinstance(v, int) and 0 <= v <= 8:
-                    covered, flagged = [], 0
-                    for nr, nc in self.neighbors(r, c):
-                        if self.state[nr][nc] == self.COVERED:
-                            covered.append((nr, nc))
-                        elif self.state[nr][nc] == self.FLAGGED:
-                            flagged += 1
-                    rem = v - flagged
-                    if rem == 0 and covered:
-                        new_safe.update(covered)
-                    if rem == len(covered) and rem > 0:
-                        new_mines.update(covered)
-        for (r, c) in new_safe:
-            if self.state[r][c] == self.COVERED:
-                self.state[r][c] = 'S'
-        for (r, c) in new_mines:
-            if self.state[r][c] == self.COVERED:
-                self.state[r][c] = self.FLAGGED
+        dirty_rows = np.flatnonzero(self.dirty.any(axis=1))
+        if not dirty_rows.size:
+            return [], []
+        dirty_cols = np.flatnonzero(self.dirty.any(axis=0))
+        # a dirty clue can only resolve cells next to it, and those only dirty
+        # their own neighbors, so all work fits in the dirty box grown by 2
+        r0, c0 = max(int(dirty_rows[0]) - 2, 0), max(int(dirty_cols[0]) - 2, 0)
+        r1, c1 = int(dirty_rows[-1]) + 3, int(dirty_cols[-1]) + 3
+        state = self.state[r0:r1, c0:c1]
+        covered = state == self.COVERED
+        clues = (state >= 0) & (state <= 8) & self.dirty[r0:r1, c0:c1]
+        covered_count = neighbor_counts(covered)
+        rem = state - neighbor_counts(state == self.FLAGGED)
+        # clues whose covered neighbors are all safe, or all mines
+        all_safe = clues & (rem == 0) & (covered_count > 0)
+        all_mines = clues & (rem == covered_count) & (rem > 0)
+        safe_mask = covered & (neighbor_counts(all_safe) > 0)
+        mine_mask = covered & (neighbor_counts(all_mines) > 0)
+        new_safe = [(r0 + int(r), c0 + int(c)) for r, c in zip(*np.nonzero(safe_mask))]
+        new_mines = [(r0 + int(r), c0 + int(c)) for r, c in zip(*np.nonzero(mine_mask))]
+        state[safe_mask] = self.SAFE
+        state[mine_mask & ~safe_mask] = self.FLAGGED
+        changed = safe_mask | mine_mask
+        self.dirty[:] = False
+        self.dirty[r0:r1, c0:c1] = changed | (neighbor_counts(changed) > 0)
         return new_safe, new_mines
 
     def get_forced_actions(self):
@@ -129,33 +388,72 @@ class MinesweeperAgent:
         return actions
 
     def estimate_probabilities(self):
-        constraints, frontier = [], set()
-        for r in range(self.rows):
-            for c in range(self.cols):
-                v = self.state[r][c]
-                if isinstance(v, int) and 0 <= v <= 8:
-                    covered, flagged = [], 0
-                    for nr, nc in self.neighbors(r, c):
-                        if self.state[nr][nc] == self.COVERED:
-                            covered.append((nr, nc))
-                        elif self.state[nr][nc] == self.FLAGGED:
-                            flagged += 1
-                    if covered:
-                        frontier.update(covered)
-                        constraints.append((covered, v - flagged))
+        constraints, frontier, probs = [], set(), {}
+        for r, c in self.clue_cells():
+            covered, mines = [], 0
+            for nr, nc in self.neighbors(r, c):
+                if self.state[nr, nc] == self.COVERED:
+                    # cells settled by an earlier call are folded into the clue
+                    # instead of being enumerated again
+                    if (nr, nc) in self.known_mines:
+                        mines += 1
+                        probs[(nr, nc)] = 1.0
+                    elif (nr, nc) in self.known_safe:
+                        probs[(nr, nc)] = 0.0
+                    else:
+                        covered.append((nr, nc))
+                elif self.state[nr, nc] == self.FLAGGED:
+                    mines += 1
+            if covered:
+                frontier.update(covered)
+                constraints.append((covered, int(self.state[r, c]) - mines))
         frontier = list(frontier)
         n = len(frontier)
-        if n > 20:
-            raise NotImplementedError
-        counts = {cell: 0 for cell in frontier}
-        total = 0
-        for bits in itertools.product([0, 1], repeat=n):
-            assign = dict(zip(frontier, bits))
-            if all(sum(assign[cell] for cell in cells) == req for cells, req in constraints):
-                total += 1
-                for cell, val in assign.items():
-                    counts[cell] += val
-        return {cell: (counts[cell] / total if total else 0) for cell in frontier}
+        # each constraint becomes (bitmask over frontier indices, required mines)
+        frontier_index = {cell: i for i, cell in enumerate(frontier)}
+        masks = [sum(1 << frontier_index[cell] for cell in cells) for cells, _ in constraints]
+        reqs = [req for _, req in constraints]
+        simplified = simplify_constraints(masks, reqs)
+        # on a contradiction the raw constraints are enumerated as before
+        if simplified is not None:
+            reduced, safe, mines = simplified
+            for i in iter_bits(safe):
+                probs[frontier[i]] = 0.0
+                self.known_safe.add(frontier[i])
+            for i in iter_bits(mines):
+                probs[frontier[i]] = 1.0
+                self.known_mines.add(frontier[i])
+            masks = [mask for mask, _ in reduced]
+            reqs = [req for _, req in reduced]
+        # components share no cells, so each one's marginals can be counted on its own
+        for cells, members in split_components(masks, n):
+            if not members:
+                # settled by simplify_constraints above
+                continue
+            if len(members) == 1:
+                # a lone clue makes every placement of its mines equally likely
+                req = reqs[members[0]]
+                p = req / len(cells) if 0 <= req <= len(cells) else 0
+                for i in cells:
+                    probs[frontier[i]] = p
+                if req == 0:
+                    self.known_safe.update(frontier[i] for i in cells)
+                elif req == len(cells):
+                    self.known_mines.update(frontier[i] for i in cells)
+                continue
+            if len(cells) > MAX_FRONTIER:
+                raise NotImplementedError
+            local = {i: j for j, i in enumerate(cells)}
+            comp_masks = [sum(1 << local[i] for i in iter_bits(masks[k])) for k in members]
+            total, counts = count_models(comp_masks, [reqs[k] for k in members], len(cells))
+            for i, j in local.items():
+                probs[frontier[i]] = counts[j] / total if total else 0
+                # certain in every valid assignment, so certain from now on
+                if total and counts[j] == 0:
+                    self.known_safe.add(frontier[i])
+                elif total and counts[j] == total:
+                    self.known_mines.add(frontier[i])
+        return probs
 
     # ------------------ New Assumption-based Inference ------------------
     def number_of_assumptions(self, unopened, mines_left):
@@ -175,61 +473,53 @@ class MinesweeperAgent:
         unopened = 0
         flagged = 0
         for nr, nc in self.neighbors(r, c):
-            if self.state[nr][nc] == self.COVERED:
+            if self.state[nr, nc] == self.COVERED:
                 unopened += 1
-            elif self.state[nr][nc] == self.FLAGGED:
+            elif self.state[nr, nc] == self.FLAGGED:
                 flagged += 1
-        mines_left = self.state[r][c] - flagged
+        mines_left = int(self.state[r, c]) - flagged
         return unopened, mines_left
 
     def assumption_actions(self):
         # Pick a number cell with small combination of its covered neighbors
-        from math import comb
         candidates = {}
         # Gather numeric clue cells adjacent to covered cells
-        for r in range(self.rows):
-            for c in range(self.cols):
-                v = self.state[r][c]
-                if isinstance(v, int) and 0 <= v <= 8:
-                    covered = []
-                    flagged = 0
-                    for nr, nc in self.neighbors(r, c):
-                        if self.state[nr][nc] == self.COVERED:
-                            covered.append((nr, nc))
-                        elif self.state[nr][nc] == self.FLAGGED:
-                            flagged += 1
-                    mines_left = v - flagged
-                    unopened = len(covered)
-                    if 0 < mines_left <= unopened:
-                        try:
-                            combos = comb(unopened, mines_left)
-                        except ValueError:
-                            continue
-                        if combos <= 10:
-                            candidates[(r, c)] = (combos, covered, mines_left)
+        for r, c in self.clue_cells():
+            covered = []
+            flagged = 0
+            for nr, nc in self.neighbors(r, c):
+                if self.state[nr, nc] == self.COVERED:
+                    covered.append((nr, nc))
+                elif self.state[nr, nc] == self.FLAGGED:
+                    flagged += 1
+            mines_left = int(self.state[r, c]) - flagged
+            unopened = len(covered)
+            if 0 < mines_left <= unopened:
+                combos = self._COMB[unopened][mines_left]
+                if combos <= 10:
+                    candidates[(r, c)] = (combos, covered, mines_left)
         if not candidates:
             return []
         # Choose the clue cell with fewest possibilities
         cell, (combos, covered, mines_left) = min(candidates.items(), key=lambda kv: kv[1][0])
-        # Generate patterns of mines (-1) vs safe (0)
-        patterns = [bits for bits in itertools.product([-1, 0], repeat=len(covered))
-                    if sum(1 for b in bits if b == -1) == mines_left]
-        # Aggregate neighbor outcomes
-        counts = {nbr: [] for nbr in covered}
-        for pat in patterns:
-            for val, nbr in zip(pat, covered):
-                counts[nbr].append(val)
+        # Enumerate the mine positions of each pattern directly, keeping bitmasks
+        # of neighbors that are a mine in every pattern and safe in every pattern
+        always_mine = always_safe = (1 << len(covered)) - 1
+        for combo in itertools.combinations(range(len(covered)), mines_left):
+            bits = sum(1 << i for i in combo)
+            always_mine &= bits
+            always_safe &= ~bits
         # Propose actions where all patterns agree
         actions = []
-        for nbr, vals in counts.items():
-            if all(v == -1 for v in vals):
+        for i, nbr in enumerate(covered):
+            if always_mine >> i & 1:
                 actions.append(('F', nbr[0], nbr[1], 'assume'))
-            if all(v == 0 for v in vals):
+            if always_safe >> i & 1:
                 actions.append(('R', nbr[0], nbr[1], 'assume'))
         # Filter out any on non-covered
         filtered = [(act, r, c, reason)
                     for act, r, c, reason in actions
-                    if self.state[r][c] == self.COVERED]
+                    if self.state[r, c] == self.COVERED]
         return filtered
 
     def next_move(self):
@@ -244,66 +534,72 @@ class MinesweeperAgent:
             if p == 1.0:
                 return [('F', cell[0], cell[1], f'prob={p:.2f}')]
         if probs:
-            min_p = min(probs.values())
-            best = [c for c, p in probs.items() if p == min_p]
-            choice = random.choice(best)
+            # track the minimum and reservoir-sample among its ties in one pass;
+            # probabilities within 1e-12 of each other count as tied, and a
+            # certainly safe cell is taken as soon as it is seen
+            min_p, choice, ties = math.inf, None, 0
+            for cell, p in probs.items():
+                if p == 0.0:
+                    min_p, choice = p, cell
+                    break
+                if p < min_p - 1e-12:
+                    min_p, choice, ties = p, cell, 1
+                elif abs(p - min_p) < 1e-12:
+                    ties += 1
+                    if random.randrange(ties) == 0:
+                        choice = cell
             return [('R', choice[0], choice[1], f'prob={min_p:.2f}')]
         assume = self.assumption_actions()
         if assume:
             return assume
-        covered = [(r, c) for r in range(self.rows) for c in range(self.cols)
-                   if self.state[r][c] == self.COVERED]
-        if covered:
-            choice = random.choice(covered)
-            return [('R', choice[0], choice[1], 'random')]
+        covered = np.flatnonzero(self.state == self.COVERED)
+        if covered.size:
+            r, c = divmod(int(covered[random.randrange(covered.size)]), self.cols)
+            return [('R', r, c, 'random')]
         return []
 
 
 def get_csp_state(board):
-    state = []
-    for r in range(board.rows):
-        row = []
-        for c in range(board.cols):
-            if (r, c) in board.flagged:
-                row.append(MinesweeperAgent.FLAGGED)
-            elif (r, c) in board.revealed:
-                v = board.board[r][c]
-                row.append(v if isinstance(v, int) else MinesweeperAgent.COVERED)
-            else:
-                row.append(MinesweeperAgent.COVERED)
-        state.append(row)
-    return state
+    # unrevealed cells and revealed mines both read as covered to the agent
+    shown = board.bb_mask(board.revealed_bb) & ~board.mine_mask
+    return np.where(board.bb_mask(board.flagged_bb), MinesweeperAgent.FLAGGED,
+                    np.where(shown, board.board, MinesweeperAgent.COVERED)).astype(np.int8)
+
+
+def get_csp_cell(board, r, c):
+    # the value get_csp_state would give a single cell
+    bit = board.bit(r, c)
+    if board.flagged_bb & bit:
+        return MinesweeperAgent.FLAGGED
+    if board.revealed_bb & bit and not board.is_mine(r, c):
+        return int(board.board[r, c])
+    return MinesweeperAgent.COVERED
 
 
 def solve_ai(board):
-    import random as _rand, copy as _copy
     # Simulate pure-random playouts to estimate safety of a guess
 
     def monte_carlo_select(original_board, covered, trials=5):
+        mines = original_board.mine_mask.ravel()
+        cols = original_board.cols
+        cov_mines = mines[[r * cols + c for r, c in covered]]
+        pool_mines = int(np.count_nonzero(cov_mines))
+        pool_safe = len(covered) - 1 - pool_mines
+        # a flagged safe cell can never be revealed, so no playout is ever won
+        blocked = any(not mines[i] for i in iter_bits(original_board.flagged_bb))
         best_cell = None
         best_score = -1
-        for cell in covered:
-            wins = 0
-            for _ in range(trials):
-                b = Board(original_board.filename)
-                b.revealed = set(original_board.revealed)
-                b.flagged = set(original_board.flagged)
-                # first move
-                res = b.apply_move('R', cell[0], cell[1])
-                if res == 'hit_mine':
-                    continue
-                # random playout
-                while not b.is_solved():
-                    all_cov = [(r, c) for r in range(b.rows) for c in range(b.cols)
-                               if (r, c) not in b.revealed and (r, c) not in b.flagged]
-                    if not all_cov:
-                        break
-                    pick = _rand.choice(all_cov)
-                    res2 = b.apply_move('R', pick[0], pick[1])
-                    if res2 == 'hit_mine':
-                        break
-                else:
-                    wins += 1
+        for cell, is_mine in zip(covered, cov_mines):
+            if is_mine or blocked:
+                wins = 0
+            elif pool_mines == 0 or pool_safe == 0:
+                wins = trials
+            else:
+                # a random playout reveals the remaining covered cells in a random
+                # order and wins iff every safe cell comes before every mine; all
+                # trials are drawn at once as rows of random sort keys
+                keys = np.random.random((trials, pool_safe + pool_mines))
+                wins = int(np.count_nonzero(keys[:, :pool_safe].max(axis=1) < keys[:, pool_safe:].min(axis=1)))
             if wins > best_score:
                 best_score = wins
                 best_cell = cell
@@ -311,13 +607,13 @@ def solve_ai(board):
 
     move_count = 0
     print("AI solving...")
+    # one agent for the whole game, kept in sync cell by cell as moves land
+    agent = MinesweeperAgent(get_csp_state(board))
     while not board.is_solved():
-        state = get_csp_state(board)
-        actions = MinesweeperAgent(state).next_move()
+        actions = agent.next_move()
         # intercept pure random guess and improve via Monte Carlo
         if len(actions) == 1 and actions[0][3] == 'random':
-            covered = [(r, c) for r in range(board.rows) for c in range(board.cols)
-                       if (r, c) not in board.revealed and (r, c) not in board.flagged]
+            covered = board.covered_cells()
             choice = monte_carlo_select(board, covered, trials=5)
             actions = [('R', choice[0], choice[1], 'monte_carlo')]
         if not actions:
@@ -328,6 +624,7 @@ def solve_ai(board):
             # print(f"=== AI Move {move_count} ===")
             # print(f"Action: {act} at ({r}, {c}),  Reason: {reason}")
             res = board.apply_move(act, r, c)
+            agent.update_cell(r, c, get_csp_cell(board, r, c))
             # print(f"Result: {res}")
             # print("Board after move:")
             # board.print_board()